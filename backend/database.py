@@ -1,7 +1,7 @@
 # In backend/database.py
 
 import os
-from sqlalchemy import create_engine, Column, Integer, String
+from sqlalchemy import create_engine, event, Column, Integer, String
 from sqlalchemy.orm import sessionmaker, declarative_base
 
 # This will create a file named 'miniproject.db' in your main project folder
@@ -12,8 +12,16 @@ DATABASE_URL = f"sqlite:///{os.path.join(BASE_DIR, 'miniproject.db')}"
 
 # Standard SQLAlchemy setup
 engine = create_engine(
-    DATABASE_URL, connect_args={"check_same_thread": False}
+    DATABASE_URL, connect_args={"check_same_thread": False}, pool_size=20
 )
+
+# WAL lets readers run alongside the single writer instead of blocking on it
+@event.listens_for(engine, "connect")
+def set_sqlite_pragmas(dbapi_connection, connection_record):
+    cursor = dbapi_connection.cursor()
+    cursor.execute("PRAGMA journal_mode=WAL")
+    cursor.execute("PRAGMA synchronous=NORMAL")
+    cursor.close()
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
 Base = declarative_base()
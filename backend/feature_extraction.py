@@ -1,12 +1,120 @@
+import functools
+import mmap
+import os
+from concurrent.futures import ThreadPoolExecutor
 import cv2
 import numpy as np
+import shapely
 from shapely.geometry import Polygon, MultiPolygon
 from pathlib import Path
 
-def extract_polygons_from_image(image_path: str, min_area: float = 150.0) -> list:
+# Shapely 2.0 added vectorized constructors (shapely.polygons, shapely.linearrings)
+# that build many geometries in a single C call. Older versions use the scalar path.
+SHAPELY_2 = int(shapely.__version__.split(".")[0]) >= 2
+
+
+def _append_valid_polygon(polygon, wall_polygons: list):
+    """Appends a polygon to the list, repairing it with buffer(0) if it is invalid."""
+    if polygon.is_valid and not polygon.is_empty:
+        wall_polygons.append(polygon)
+    elif not polygon.is_valid:
+        fixed_polygon = polygon.buffer(0)
+        if fixed_polygon.is_valid and not fixed_polygon.is_empty:
+            if isinstance(fixed_polygon, MultiPolygon):
+                wall_polygons.extend(list(fixed_polygon.geoms))
+            else:
+                wall_polygons.append(fixed_polygon)
+        else:
+            print(f"[WARN] Could not fix invalid polygon with area {polygon.area:.2f}")
+
+
+# --- Thresholding parameters ---
+ADAPTIVE_BLOCK_SIZE = 11 # Must be odd
+ADAPTIVE_C = 2 # A constant subtracted from the mean
+OPEN_KERNEL_SIZE = 3
+
+# With downscale=True, blueprints larger than this (in pixels, either side)
+# are halved with cv2.pyrDown before thresholding, so every stage touches 4x
+# fewer bytes. It is opt-in: the block size and opening kernel stay in pixels,
+# so at half resolution they cover twice the blueprint area and the opening
+# removes walls thinner than about 6 full-resolution pixels.
+DOWNSCALE_ABOVE_PX = 2000
+
+# approxPolyDP tolerance as a fraction of the contour perimeter (min 1 px).
+# Fewer vertices make the earcut triangulation in build_3d_model much cheaper.
+SIMPLIFY_EPSILON_RATIO = 0.002
+
+
+def read_image(image_path: str, flags: int = cv2.IMREAD_COLOR):
+    """
+    Decodes an image straight from a memory-mapped file, so the bytes come
+    from the OS page cache without an extra read into a Python buffer.
+    Returns None if the file is missing, empty or can't be decoded.
+    """
+    try:
+        with open(image_path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            return cv2.imdecode(np.frombuffer(mm, np.uint8), flags)
+    except (OSError, ValueError):
+        return None
+
+
+def _threshold_and_open(gray: np.ndarray) -> np.ndarray:
+    """Inverted adaptive threshold followed by a 3x3 morphological opening."""
+    # 1. Use Adaptive Thresholding instead of a fixed value.
+    # This is MUCH more robust for blueprints.
+    # It calculates the threshold for small regions of the image.
+    thresh = cv2.adaptiveThreshold(
+        gray,
+        255, # Max value
+        cv2.ADAPTIVE_THRESH_GAUSSIAN_C, # Method
+        cv2.THRESH_BINARY_INV, # Invert (black lines become white)
+        ADAPTIVE_BLOCK_SIZE,
+        ADAPTIVE_C
+    )
+
+    # 2. (REMOVED) Do NOT use MORPH_CLOSE.
+    # It fills in your door and window gaps, which is the
+    # main cause of the "solid box" problem.
+    # We can use MORPH_OPEN to remove small noise *without* closing gaps.
+    open_kernel = np.ones((OPEN_KERNEL_SIZE, OPEN_KERNEL_SIZE), np.uint8)
+    return cv2.morphologyEx(thresh, cv2.MORPH_OPEN, open_kernel, iterations=1)
+
+
+def _simplify_contour(contour: np.ndarray) -> np.ndarray:
+    """Reduces a contour to its minimal polygonal approximation."""
+    epsilon = max(1.0, cv2.arcLength(contour, True) * SIMPLIFY_EPSILON_RATIO)
+    return cv2.approxPolyDP(contour, epsilon, True)
+
+
+def _polygons_from_contours(contours: list) -> list:
+    """
+    Builds all contour polygons at once from one flat coordinate buffer.
+    Requires Shapely 2.0. Invalid polygons are repaired in a second pass.
+    """
+    if not contours:
+        return []
+
+    points_list = [contour.reshape(-1, 2) for contour in contours]
+    coords = np.concatenate(points_list).astype(np.float64)
+    # Ring ID for every vertex, so linearrings() knows where each ring ends
+    indices = np.repeat(np.arange(len(points_list)), [len(p) for p in points_list])
+
+    rings = shapely.linearrings(coords, indices=indices)
+    polygons = shapely.polygons(rings)
+    valid = shapely.is_valid(polygons) & ~shapely.is_empty(polygons)
+
+    wall_polygons = list(polygons[valid])
+    for polygon in polygons[~valid]:
+        _append_valid_polygon(polygon, wall_polygons)
+    return wall_polygons
+
+
+def extract_polygons_from_image(image_path: str, min_area: float = 150.0, downscale: bool = False) -> list:
     """
     Extracts wall polygons from a blueprint image using OpenCV and Shapely.
     Returns a list of valid Shapely Polygon objects.
+    Set downscale=True to threshold large blueprints at half resolution
+    (faster, but thin walls may be lost; see DOWNSCALE_ABOVE_PX).
     """
     print(f"[INFO] feature_extraction: Loading image: {image_path}")
     
@@ -15,7 +123,7 @@ def extract_polygons_from_image(image_path: str, min_area: float = 150.0) -> lis
     filename_stem = p.stem
 
     try:
-        image = cv2.imread(image_path)
+        image = read_image(image_path)
         if image is None:
             print(f"[ERROR] feature_extraction: Could not read image at path: {image_path}")
             return []
@@ -23,32 +131,19 @@ def extract_polygons_from_image(image_path: str, min_area: float = 150.0) -> lis
         h_img, w_img = image.shape[:2]
         gray = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
         
-        # --- START FIX ---
-        # 1. Use Adaptive Thresholding instead of a fixed value.
-        # This is MUCH more robust for blueprints.
-        # It calculates the threshold for small regions of the image.
-        thresh = cv2.adaptiveThreshold(
-            gray, 
-            255, # Max value
-            cv2.ADAPTIVE_THRESH_GAUSSIAN_C, # Method
-            cv2.THRESH_BINARY_INV, # Invert (black lines become white)
-            11, # Block size (must be odd)
-            2  # A constant subtracted from the mean
-        )
-
-        # 2. (REMOVED) Do NOT use MORPH_CLOSE. 
-        # It fills in your door and window gaps, which is the
-        # main cause of the "solid box" problem.
-        # We can use MORPH_OPEN to remove small noise *without* closing gaps.
-        open_kernel_size = 3
-        open_kernel = np.ones((open_kernel_size, open_kernel_size), np.uint8)
-        cleaned_image = cv2.morphologyEx(thresh, cv2.MORPH_OPEN, open_kernel, iterations=1)
-        # --- END FIX ---
+        # 1-2. Adaptive threshold + MORPH_OPEN (see _threshold_and_open)
+        scale = 2 if downscale and max(h_img, w_img) > DOWNSCALE_ABOVE_PX else 1
+        work_gray = cv2.pyrDown(gray) if scale == 2 else gray
+        cleaned_image = _threshold_and_open(work_gray)
         
         # --- DEBUG SAVING ---
         debug_path_cleaned = str(output_dir / f"{filename_stem}_cleaned.png")
         try:
-            cv2.imwrite(debug_path_cleaned, cleaned_image)
+            # Saved at full resolution so it lines up with the returned polygons
+            debug_image = cleaned_image if scale == 1 else cv2.resize(
+                cleaned_image, (w_img, h_img), interpolation=cv2.INTER_NEAREST
+            )
+            cv2.imwrite(debug_path_cleaned, debug_image)
             print(f"[DEBUG] Saved cleaned image to: {debug_path_cleaned}")
         except Exception as write_e:
             print(f"[WARN] Could not write debug image: {write_e}")
@@ -67,34 +162,32 @@ def extract_polygons_from_image(image_path: str, min_area: float = 150.0) -> lis
         # A more advanced solution would use the hierarchy to build
         # polygons with holes (e.g., for hollow walls).
 
+        # 4. Filter small contours (and anything that can't form a ring),
+        # then map the survivors back to full-resolution coordinates
+        scaled_min_area = min_area / (scale ** 2)
+        kept_contours = [
+            contour * scale for contour in contours
+            if len(contour) >= 3 and cv2.contourArea(contour) >= scaled_min_area
+        ]
+
+        # 5. Simplify the survivors (this can collapse slivers below 3 points)
+        kept_contours = [_simplify_contour(contour) for contour in kept_contours]
+        kept_contours = [contour for contour in kept_contours if len(contour) >= 3]
+
         wall_polygons = [] # This will store Shapely Polygons
-        for contour in contours:
-            # 4. Filter small contours
-            if cv2.contourArea(contour) < min_area: 
-                continue
-                
-            points = contour.reshape(-1, 2) 
-            
-            if points.shape[0] < 3:
-                continue 
-                
+        if SHAPELY_2:
             try:
-                polygon = Polygon([tuple(p) for p in points])
-                
-                if polygon.is_valid and not polygon.is_empty:
-                    wall_polygons.append(polygon)
-                elif not polygon.is_valid:
-                    fixed_polygon = polygon.buffer(0)
-                    if fixed_polygon.is_valid and not fixed_polygon.is_empty:
-                        if isinstance(fixed_polygon, MultiPolygon):
-                            wall_polygons.extend(list(fixed_polygon.geoms))
-                        else:
-                            wall_polygons.append(fixed_polygon)
-                    else:
-                        print(f"[WARN] Could not fix invalid polygon with area {polygon.area:.2f}")
-
+                wall_polygons = _polygons_from_contours(kept_contours)
             except Exception as e:
-                print(f"Warning: Could not create/process polygon from contour points. Error: {e}")
+                print(f"Warning: Could not create/process polygons from contour points. Error: {e}")
+        else:
+            for contour in kept_contours:
+                points = contour.reshape(-1, 2)
+                try:
+                    polygon = Polygon([tuple(p) for p in points])
+                    _append_valid_polygon(polygon, wall_polygons)
+                except Exception as e:
+                    print(f"Warning: Could not create/process polygon from contour points. Error: {e}")
 
         print(f"[INFO] feature_extraction: Returning {len(wall_polygons)} valid Shapely wall polygons.")
         
@@ -104,13 +197,14 @@ def extract_polygons_from_image(image_path: str, min_area: float = 150.0) -> lis
             inset = 10
             safe_inset = min(inset, h_img // 2 -1 , w_img // 2 - 1)
             points = [ (safe_inset, safe_inset), (w_img - safe_inset, safe_inset), (w_img - safe_inset, h_img - safe_inset), (safe_inset, h_img - safe_inset) ]
-            fallback_poly = Polygon(points)
-            if fallback_poly.is_valid:
-                print("[INFO] Returning fallback bounding box.")
-                return [fallback_poly]
+            # An axis-aligned rectangle is always valid, so no is_valid check is needed
+            if SHAPELY_2:
+                coords = np.array(points, dtype=np.float64)
+                fallback_poly = shapely.polygons(coords[None, :, :])[0]
             else:
-                print("[ERROR] Could not create fallback bounding box.")
-                return []
+                fallback_poly = Polygon(points)
+            print("[INFO] Returning fallback bounding box.")
+            return [fallback_poly]
 
         return wall_polygons
 
@@ -118,41 +212,238 @@ def extract_polygons_from_image(image_path: str, min_area: float = 150.0) -> lis
         print(f"[ERROR] feature_extraction: An unexpected error occurred: {e}")
         return []
 
-# --- Your find_features function remains unchanged, but see Step 2 ---
-def find_features(image_path: str, template_path: str, threshold: float = 0.8) -> list:
-    # ... (rest of your find_features code)
+# Upper bound on template matches kept per search (after NMS)
+MAX_MATCHES = 500
+
+
+def _match_peaks(res: np.ndarray, w: int, h: int, threshold: float) -> tuple:
+    """
+    Non-maximum suppression on a matchTemplate response.
+    Keeps only pixels that are the maximum of their (h/2 x w/2) neighbourhood
+    and above threshold, so each match yields one peak instead of a cluster.
+    At most the MAX_MATCHES strongest peaks are returned, as (ys, xs) like np.where.
+    """
+    local_max = cv2.dilate(res, _nms_kernel(w, h))
+    flat = np.where(res == local_max, res, -np.inf).ravel()
+    idx = _top_k(flat, threshold)
+    ys, xs = np.unravel_index(idx, res.shape)
+    return _suppress_near_duplicates(ys, xs, flat[idx], w, h)
+
+
+def _nms_kernel(w: int, h: int) -> np.ndarray:
+    return np.ones((max(1, h // 2), max(1, w // 2)), np.uint8)
+
+
+def _suppress_near_duplicates(ys: np.ndarray, xs: np.ndarray, scores: np.ndarray, w: int, h: int) -> tuple:
+    """
+    Greedy NMS over peak positions: keeps the highest score within
+    (h // 4, w // 4) and drops the rest. Catches plateaus of tied scores,
+    where every pixel equals the dilated maximum.
+    """
+    order = np.lexsort((xs, ys, -scores))
+    kept = []
+    for i in order:
+        if not any(abs(ys[i] - ys[j]) <= h // 4 and abs(xs[i] - xs[j]) <= w // 4 for j in kept):
+            kept.append(i)
+    kept = np.array(sorted(kept), dtype=np.int64)
+    return ys[kept], xs[kept]
+
+
+def _top_k(scores: np.ndarray, threshold: float) -> np.ndarray:
+    """Indices of the (at most MAX_MATCHES) highest scores >= threshold, in O(N)."""
+    if scores.size == 0:
+        return np.zeros(0, np.int64)
+    k = min(MAX_MATCHES, scores.size)
+    idx = np.argpartition(-scores, k - 1)[:k]
+    return idx[scores[idx] >= threshold]
+
+
+@functools.lru_cache(maxsize=16)
+def _load_template(template_path: str, mtime: float):
+    """Reads a template once per (path, mtime); 'mtime' only keys the cache."""
+    return read_image(template_path, cv2.IMREAD_GRAYSCALE)
+
+
+def preload_templates(template_dir) -> int:
+    """
+    Decodes every *_template.png in template_dir into the template cache,
+    so the first /convert doesn't pay for it. Returns how many were loaded.
+    """
+    loaded = 0
+    for template_path in sorted(Path(template_dir).glob("*_template.png")):
+        if _load_template(str(template_path), os.path.getmtime(template_path)) is not None:
+            loaded += 1
+    return loaded
+
+
+# --- Coarse-to-fine template matching ---
+# Match on a Gaussian pyramid (up to 1/4 scale) first to find candidate
+# regions, then compute the full-resolution response only inside them.
+# Levels are only added while the shrunken template keeps at least
+# MIN_PYRAMID_TEMPLATE_SIDE pixels on its short side.
+MAX_PYRAMID_LEVELS = 2
+MIN_PYRAMID_TEMPLATE_SIDE = 16
+PYRAMID_THRESHOLD_SLACK = 0.2 # Coarse scores run lower, so relax the threshold there
+# If the padded candidate crops add up to more than this fraction of the
+# image, matching the whole image at full resolution is cheaper
+PYRAMID_MAX_COVERAGE = 0.5
+
+
+def _pyramid_levels(template: np.ndarray) -> int:
+    levels = 0
+    while levels < MAX_PYRAMID_LEVELS and (min(template.shape) >> (levels + 1)) >= MIN_PYRAMID_TEMPLATE_SIDE:
+        levels += 1
+    return levels
+
+
+def _candidate_regions(coarse: np.ndarray, threshold: float, factor: int, res_shape: tuple, pad: tuple) -> list:
+    """
+    Full-resolution response boxes (y0, y1, x0, x1) around every connected
+    region of the coarse response that scores >= threshold, each with the
+    padded box (py0, py1, px0, px1) that has to be matched to NMS it.
+    """
+    candidates = (coarse >= threshold).astype(np.uint8)
+    count, _, stats, _ = cv2.connectedComponentsWithStats(candidates, connectivity=8)
+    margin = 2 * factor
+    res_h, res_w = res_shape
+    pad_y, pad_x = pad
+    regions = []
+    for x, y, bw, bh, _ in stats[1:count]:
+        y0, y1 = max(y * factor - margin, 0), min((y + bh) * factor + margin, res_h)
+        x0, x1 = max(x * factor - margin, 0), min((x + bw) * factor + margin, res_w)
+        padded = (max(y0 - pad_y, 0), min(y1 + pad_y, res_h), max(x0 - pad_x, 0), min(x1 + pad_x, res_w))
+        regions.append(((y0, y1, x0, x1), padded))
+    return regions
+
+
+def _coarse_regions(img_gray: np.ndarray, template: np.ndarray, threshold: float, pad: tuple):
+    """
+    Candidate regions from the pyramid, or None when matching the whole
+    image at full resolution is the better (or only) option.
+    """
+    levels = _pyramid_levels(template)
+    if levels == 0: return None
+    img_small, tpl_small = img_gray, template
+    for _ in range(levels):
+        img_small, tpl_small = cv2.pyrDown(img_small), cv2.pyrDown(tpl_small)
+    if img_small.shape[0] < tpl_small.shape[0] or img_small.shape[1] < tpl_small.shape[1]: return None
+
+    h, w = template.shape
+    res_shape = (img_gray.shape[0] - h + 1, img_gray.shape[1] - w + 1)
+    coarse = cv2.matchTemplate(img_small, tpl_small, cv2.TM_CCOEFF_NORMED)
+    regions = _candidate_regions(coarse, threshold - PYRAMID_THRESHOLD_SLACK, 1 << levels, res_shape, pad)
+    # Padded crops overlap, so count the pixels each one actually matches
+    matched = sum((py1 - py0 + h - 1) * (px1 - px0 + w - 1) for _, (py0, py1, px0, px1) in regions)
+    if matched > PYRAMID_MAX_COVERAGE * img_gray.size: return None
+    return regions
+
+
+def _locate_matches(img_gray: np.ndarray, template: np.ndarray, threshold: float) -> tuple:
+    """
+    Returns the (ys, xs) top-left corners of template matches, like np.where.
+    Peaks come from the full-resolution response inside each candidate
+    region, so they match _match_peaks wherever the coarse pass finds them.
+    """
+    h, w = template.shape
+    nms_kernel = _nms_kernel(w, h)
+    regions = _coarse_regions(img_gray, template, threshold, nms_kernel.shape)
+    if regions is None:
+        res = cv2.matchTemplate(img_gray, template, cv2.TM_CCOEFF_NORMED)
+        return _match_peaks(res, w, h, threshold)
+
+    # Full-resolution response inside each region, padded by the NMS window
+    # so every candidate is compared against its whole neighbourhood
+    peaks = {}
+    for (y0, y1, x0, x1), (py0, py1, px0, px1) in regions:
+        res = cv2.matchTemplate(img_gray[py0:py1 + h - 1, px0:px1 + w - 1], template, cv2.TM_CCOEFF_NORMED)
+        local_max = cv2.dilate(res, nms_kernel)
+        inner = res[y0 - py0:y1 - py0, x0 - px0:x1 - px0]
+        is_peak = (inner == local_max[y0 - py0:y1 - py0, x0 - px0:x1 - px0]) & (inner >= threshold)
+        for dy, dx in zip(*np.nonzero(is_peak)):
+            peaks[(y0 + dy, x0 + dx)] = inner[dy, dx]
+
+    points = np.array(list(peaks), dtype=np.int64).reshape(-1, 2)
+    scores = np.array(list(peaks.values()), dtype=np.float64)
+    idx = _top_k(scores, threshold)
+    return _suppress_near_duplicates(points[idx, 0], points[idx, 1], scores[idx], w, h)
+
+
+def find_features(img_gray: np.ndarray, template_path: str, threshold: float = 0.8) -> list:
+    """
+    Finds a door/window template in an already-loaded grayscale blueprint.
+    Returns one Shapely box per match.
+    """
     print(f"[INFO] find_features: Matching '{Path(template_path).name}'...")
     try:
-        img_gray = cv2.imread(image_path, cv2.IMREAD_GRAYSCALE)
-        
-        # --- CLEANUP SUGGESTION (See Step 2) ---
-        # This line is confusing. It's better to pass the correct path from main.py
-        # template_full_path = str(Path(__file__).parent / Path(template_path).name) 
-        
-        # --- This is simpler if main.py is fixed: ---
-        template_full_path = template_path
+        if img_gray is None: print("[ERROR] find_features: No main image given"); return []
+        if not os.path.exists(template_path): print(f"[ERROR] find_features: Could not read template image: {template_path}"); return []
 
-        template = cv2.imread(template_full_path, cv2.IMREAD_GRAYSCALE)
-        
-        if img_gray is None: print(f"[ERROR] find_features: Could not read main image: {image_path}"); return []
-        if template is None: print(f"[ERROR] find_features: Could not read template image: {template_full_path}"); return []
+        template = _load_template(template_path, os.path.getmtime(template_path))
+        if template is None: print(f"[ERROR] find_features: Could not read template image: {template_path}"); return []
             
         w, h = template.shape[::-1]
-        res = cv2.matchTemplate(img_gray, template, cv2.TM_CCOEFF_NORMED)
-        loc = np.where(res >= threshold)
+        loc = _locate_matches(img_gray, template, threshold)
         
-        feature_polygons = [] 
-        for pt in zip(*loc[::-1]): 
-            top_left = pt
-            bottom_right = (pt[0] + w, pt[1] + h)
-            points = [ top_left, (bottom_right[0], top_left[1]), bottom_right, (top_left[0], bottom_right[1]) ]
-            poly = Polygon([tuple(p) for p in points])
-            if poly.is_valid and not poly.is_empty:
-                feature_polygons.append(poly)
+        if SHAPELY_2:
+            # One C call builds every match box straight from the np.where arrays
+            ys, xs = loc
+            boxes = shapely.box(xs, ys, xs + w, ys + h)
+            valid = shapely.is_valid(boxes) & ~shapely.is_empty(boxes)
+            feature_polygons = list(boxes[valid])
+        else:
+            feature_polygons = [] 
+            for pt in zip(*loc[::-1]): 
+                top_left = pt
+                bottom_right = (pt[0] + w, pt[1] + h)
+                points = [ top_left, (bottom_right[0], top_left[1]), bottom_right, (top_left[0], bottom_right[1]) ]
+                poly = Polygon([tuple(p) for p in points])
+                if poly.is_valid and not poly.is_empty:
+                    feature_polygons.append(poly)
                 
         print(f"[INFO] find_features: Found {len(feature_polygons)} matches for '{Path(template_path).name}'.")
         return feature_polygons
         
     except Exception as e:
         print(f"[ERROR] find_features: An error occurred during template matching: {e}")
-        return []
\ No newline at end of file
+        return []
+
+
+# --- Result caches ---
+# /convert is often re-run on the same blueprint while iterating in the UI.
+# Results are keyed on a digest of the file contents (an mtime would change
+# on every re-upload); main.py stores each upload at a path derived from
+# that digest, so the key always describes the bytes being read. Shapely
+# geometries are immutable, so the cached tuples can be handed out directly.
+RESULT_CACHE_SIZE = 32
+
+
+@functools.lru_cache(maxsize=RESULT_CACHE_SIZE)
+def _extract_cached(image_path: str, content_key: str, min_area: float) -> tuple:
+    return tuple(extract_polygons_from_image(image_path, min_area))
+
+
+@functools.lru_cache(maxsize=RESULT_CACHE_SIZE)
+def _find_features_cached(image_path: str, content_key: str, templates: tuple, threshold: float) -> tuple:
+    # Decode the blueprint once, up front, and share it between all templates
+    img_gray = read_image(image_path, cv2.IMREAD_GRAYSCALE)
+    with ThreadPoolExecutor(max_workers=len(templates)) as executor:
+        results = executor.map(lambda template: find_features(img_gray, template[0], threshold), templates)
+        return tuple(tuple(polygons) for polygons in results)
+
+
+def extract_polygons_cached(image_path: str, content_key: str, min_area: float = 150.0) -> list:
+    """extract_polygons_from_image, memoized on (path, content_key, min_area)."""
+    return list(_extract_cached(image_path, content_key, min_area))
+
+
+def find_features_cached(image_path: str, content_key: str, template_paths: list, threshold: float = 0.8) -> list:
+    """
+    Runs find_features for every template on the blueprint at image_path,
+    concurrently and with a single decode. Memoized on the blueprint content
+    and each template's mtime. Returns one polygon list per template.
+    """
+    templates = tuple(
+        (path, os.path.getmtime(path) if os.path.exists(path) else None)
+        for path in template_paths
+    )
+    return [list(polygons) for polygons in _find_features_cached(image_path, content_key, templates, threshold)]
@@ -1,6 +1,9 @@
+import os
+from concurrent.futures import ThreadPoolExecutor
 import trimesh
 import numpy as np
-from shapely.geometry import Polygon 
+from shapely.geometry import Polygon, MultiPolygon, GeometryCollection
+from shapely.ops import unary_union
 
 # --- CONSTANTS ---
 REAL_WORLD_WALL_THICKNESS_METERS = 0.2
@@ -9,6 +12,89 @@ REAL_WORLD_DOOR_HEIGHT_METERS = 2.1
 REAL_WORLD_WINDOW_HEIGHT_METERS = 1.2 # How tall the window opening is
 REAL_WORLD_WINDOW_SILL_HEIGHT_METERS = 0.9 # How far the window is from the floor
 
+def _valid_polygons(polygons, label):
+    """Keeps only valid, non-empty polygons, warning about the rest."""
+    valid = []
+    for polygon in polygons:
+        if polygon.is_valid and not polygon.is_empty:
+            valid.append(polygon)
+        else:
+            print(f"Warning: Skipping invalid or empty {label} polygon.")
+    return valid
+
+
+def _polygon_parts(geometry):
+    """Flattens a Shapely boolean result into its Polygon parts."""
+    if isinstance(geometry, Polygon):
+        return [geometry] if not geometry.is_empty else []
+    if isinstance(geometry, (MultiPolygon, GeometryCollection)):
+        return [part for geom in geometry.geoms for part in _polygon_parts(geom)]
+    return []
+
+
+def _triangulate_part(job):
+    """Earcut-triangulates one (polygon, z_bottom, height) job; None if it fails."""
+    polygon, _, _ = job
+    try:
+        return trimesh.creation.triangulate_polygon(polygon)
+    except Exception as e:
+        print(f"Warning: Could not extrude wall polygon. Error: {e}")
+        return None
+
+
+def _triangulate_jobs(extrusion_jobs: list) -> list:
+    """
+    Triangulates (polygon, z_bottom, height) jobs into
+    (triangulation, z_bottom, z_top), dropping the ones that fail.
+    """
+    # The triangulations are independent and earcut runs in C, so spread
+    # them over a thread pool
+    with ThreadPoolExecutor(max_workers=os.cpu_count()) as executor:
+        triangulations = list(executor.map(_triangulate_part, extrusion_jobs))
+
+    return [
+        (triangulation, z_bottom, z_bottom + height)
+        for triangulation, (_, z_bottom, height) in zip(triangulations, extrusion_jobs)
+        if triangulation is not None and len(triangulation[1]) > 0
+    ]
+
+
+def _extrude_triangulations(triangulations, z_bottoms, z_tops):
+    """
+    Extrudes many 2D triangulations into one Trimesh in a single vectorized
+    pass: every job's vertices are stacked into one (N, 2) array, then the
+    bottom caps, top caps and side walls are built for all jobs at once.
+    """
+    counts = np.array([len(vertices) for vertices, _ in triangulations])
+    offsets = np.concatenate([[0], np.cumsum(counts)[:-1]])
+    vertices_2d = np.concatenate([vertices for vertices, _ in triangulations]).astype(np.float64)
+    faces = np.concatenate([
+        tri_faces + offset for (_, tri_faces), offset in zip(triangulations, offsets)
+    ])
+    n = len(vertices_2d)
+
+    # Make every triangle counter-clockwise so the caps and sides face outward
+    a, b, c = (vertices_2d[faces[:, i]] for i in range(3))
+    cross = (b[:, 0] - a[:, 0]) * (c[:, 1] - a[:, 1]) - (b[:, 1] - a[:, 1]) * (c[:, 0] - a[:, 0])
+    faces[cross < 0] = faces[cross < 0][:, ::-1]
+
+    # Boundary edges appear in exactly one triangle; offsets keep jobs apart
+    edges = faces[:, [0, 1, 1, 2, 2, 0]].reshape(-1, 2)
+    boundary = edges[trimesh.grouping.group_rows(np.sort(edges, axis=1), require_count=1)]
+    e0, e1 = boundary[:, 0], boundary[:, 1]
+    sides = np.concatenate([
+        np.column_stack([e0, e1, e1 + n]),
+        np.column_stack([e0, e1 + n, e0 + n]),
+    ])
+
+    vertices = np.vstack([
+        np.column_stack([vertices_2d, np.repeat(z_bottoms, counts)]),
+        np.column_stack([vertices_2d, np.repeat(z_tops, counts)]),
+    ])
+    all_faces = np.vstack([faces[:, ::-1], faces + n, sides])
+    return trimesh.Trimesh(vertices=vertices, faces=all_faces, process=False)
+
+
 def build_3d_model(
     wall_polygons, 
     door_polygons, 
@@ -35,80 +121,59 @@ def build_3d_model(
     
     # --- MODEL BUILDING ---
     
-    all_wall_meshes = []
-    for polygon in wall_polygons:
-        try:
-            # ---!!! FIX START !!!---
-            # Check if the polygon is valid and not empty
-            if polygon.is_valid and not polygon.is_empty:
-                # Pass the Shapely Polygon object *directly* to trimesh
-                wall_mesh = trimesh.creation.extrude_polygon(polygon, extrusion_height_pixels)
-                all_wall_meshes.append(wall_mesh)
-            else:
-                print(f"Warning: Skipping invalid or empty wall polygon.")
-            # ---!!! FIX END !!!---
-        except Exception as e:
-            # This catch is still good, in case trimesh fails for other reasons
-            print(f"Warning: Could not extrude wall polygon. Error: {e}")
-            
-    if not all_wall_meshes:
+    # Walls, doors and windows are all vertical extrusions of 2D shapes, so
+    # the boolean can be done in 2D: cut the wall height into slabs wherever
+    # an opening starts or ends, subtract the openings active in each slab
+    # from the wall footprint with Shapely, and extrude each slab once.
+    walls = unary_union(_valid_polygons(wall_polygons, "wall"))
+    if walls.is_empty:
         print("ERROR: No valid wall meshes created.")
         return trimesh.Trimesh() 
-        
-    final_wall_mesh = trimesh.util.concatenate(all_wall_meshes)
-    
-    # --- Combine Doors and Windows for Subtraction ---
-    all_opening_meshes = []
-    
-    # Create Door Meshes
-    for door_poly in door_polygons:
-        try:
-            # ---!!! FIX START !!!---
-            # Check if the polygon is valid and not empty
-            if door_poly.is_valid and not door_poly.is_empty:
-                # Pass the Shapely Polygon object *directly* to trimesh
-                door_box = trimesh.creation.extrude_polygon(door_poly, door_height_pixels)
-                all_opening_meshes.append(door_box)
-            else:
-                print(f"Warning: Skipping invalid or empty door geometry.")
-            # ---!!! FIX END !!!---
-        except Exception as e:
-            print(f"Warning: Could not extrude door polygon. Error: {e}")
-
-    # --- NEW: Create Window Meshes ---
-    for window_poly in window_polygons:
-        try:
-            # ---!!! FIX START !!!---
-            # Check if the polygon is valid and not empty
-            if window_poly.is_valid and not window_poly.is_empty:
-                # Pass the Shapely Polygon object *directly* to trimesh
-                window_box = trimesh.creation.extrude_polygon(window_poly, window_height_pixels)
-                # Move the window box up off the floor
-                window_box.apply_translation([0, 0, window_sill_pixels]) 
-                all_opening_meshes.append(window_box)
-            else:
-                print(f"Warning: Skipping invalid or empty window geometry.")
-            # ---!!! FIX END !!!---
-        except Exception as e:
-            print(f"Warning: Could not extrude window polygon. Error: {e}")
-
-
-    # Subtract all openings (doors and windows) from the walls
-    if all_opening_meshes:
-        combined_openings_mesh = trimesh.util.concatenate(all_opening_meshes)
-        print(f"Subtracting {len(door_polygons)} doors and {len(window_polygons)} windows from walls...")
-        try:
-            # Use 'blender' engine for potentially better results
-            final_model = final_wall_mesh.difference(combined_openings_mesh) 
-            if final_model.is_empty:
-                print("Warning: Boolean difference resulted in an empty mesh. Returning original wall mesh.")
-                final_model = final_wall_mesh
-        except Exception as e:
-            print(f"Warning: Boolean difference failed: {e}. Returning original wall mesh.")
-            final_model = final_wall_mesh 
-    else:
-        # If no doors or windows found, just return the solid walls
-        final_model = final_wall_mesh
+
+    doors = unary_union(_valid_polygons(door_polygons, "door"))
+    windows = unary_union(_valid_polygons(window_polygons, "window"))
+    window_top_pixels = window_sill_pixels + window_height_pixels
+    print(f"Subtracting {len(door_polygons)} doors and {len(window_polygons)} windows from walls...")
+
+    z_levels = sorted({
+        min(max(z, 0.0), extrusion_height_pixels)
+        for z in (0.0, door_height_pixels, window_sill_pixels, window_top_pixels, extrusion_height_pixels)
+    })
+
+    extrusion_jobs = []
+    for z_bottom, z_top in zip(z_levels[:-1], z_levels[1:]):
+        z_mid = (z_bottom + z_top) / 2
+        footprint = walls
+        if not doors.is_empty and z_mid < door_height_pixels:
+            footprint = footprint.difference(doors)
+        if not windows.is_empty and window_sill_pixels < z_mid < window_top_pixels:
+            footprint = footprint.difference(windows)
+        extrusion_jobs.extend(
+            (polygon, z_bottom, z_top - z_bottom)
+            for polygon in _polygon_parts(footprint)
+            if polygon.is_valid and not polygon.is_empty
+        )
+
+    triangulated_jobs = _triangulate_jobs(extrusion_jobs)
+    if not triangulated_jobs:
+        # The openings covered every slab: keep the solid walls like the
+        # old 3D boolean did instead of shipping an empty model
+        print("Warning: Subtracting openings resulted in an empty mesh. Returning original wall mesh.")
+        triangulated_jobs = _triangulate_jobs([
+            (polygon, 0.0, extrusion_height_pixels)
+            for polygon in _polygon_parts(walls)
+            if polygon.is_valid and not polygon.is_empty
+        ])
+    if not triangulated_jobs:
+        print("ERROR: No valid wall meshes created.")
+        return trimesh.Trimesh() 
+
+    # One extrusion for every slab polygon, instead of one Trimesh each
+    final_model = _extrude_triangulations(
+        [triangulation for triangulation, _, _ in triangulated_jobs],
+        np.array([z_bottom for _, z_bottom, _ in triangulated_jobs]),
+        np.array([z_top for _, _, z_top in triangulated_jobs]),
+    )
 
     # --- Scale the final model back to real-world meters ---
     if scale_factor > 0:
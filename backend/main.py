@@ -2,13 +2,20 @@
 
 # --- ADD THESE IMPORTS ---
 from pydantic import BaseModel
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.orm import Session
 from fastapi import Depends
 from .database import SessionLocal, create_db_and_tables, User
 from .security import get_password_hash
 # --- END NEW IMPORTS ---
+import asyncio
+import hashlib
+import mimetypes
+import os
+import tempfile
 import time
-import shutil
+import uuid
+import aiofiles
 from pathlib import Path
 from fastapi import (
     FastAPI, Request, UploadFile, File, Form, 
@@ -23,7 +30,7 @@ from fastapi.templating import Jinja2Templates
 # and the app is run using 'uvicorn backend.main:app', we must reference 
 # other modules within the package (like feature_extraction and geometry_engine)
 # using the 'backend.' prefix.
-from backend.feature_extraction import extract_polygons_from_image, find_features
+from backend.feature_extraction import extract_polygons_cached, find_features_cached, preload_templates
 from backend.geometry_engine import build_3d_model
 
 
@@ -37,6 +44,8 @@ def on_startup():
     print("Creating database and tables...")
     create_db_and_tables()
     print("Database and tables created.")
+    # Decode the door/window templates once, up front
+    print(f"Preloaded {preload_templates(BACKEND_DIR)} feature templates.")
 # --- END STARTUP EVENT ---
 # --- Pydantic model for receiving user data ---
 class UserCreate(BaseModel):
@@ -59,9 +68,14 @@ FRONTEND_DIR = BASE_DIR / "frontend"
 UPLOAD_DIR = BACKEND_DIR / "uploads"
 MODELS_DIR = BACKEND_DIR / "models"
 
+UPLOAD_CHUNK_SIZE = 1 << 20
+
 UPLOAD_DIR.mkdir(exist_ok=True)
 MODELS_DIR.mkdir(exist_ok=True)
 
+# Serve exported models with the binary glTF MIME type
+mimetypes.add_type("model/gltf-binary", ".glb")
+
 # Mount static files and templates
 app.mount("/static", StaticFiles(directory=FRONTEND_DIR), name="static")
 app.mount("/models", StaticFiles(directory=MODELS_DIR), name="models")
@@ -85,13 +99,28 @@ async def convert_blueprint_to_3d(
     Receives an image, finds walls, doors, and windows,
     builds a 3D model, and returns a JSON response.
     """
-    upload_path = UPLOAD_DIR / blueprint_file.filename
+    # Each request streams into its own temp file, so concurrent uploads with
+    # the same filename can't overwrite each other mid-request. The finished
+    # file is then moved to a content-addressed path: identical bytes always
+    # share one path, and different bytes never do.
+    fd, tmp_path = tempfile.mkstemp(dir=UPLOAD_DIR, suffix=".part")
+    os.close(fd)
     try:
-        with open(upload_path, "wb") as buffer:
-            shutil.copyfileobj(blueprint_file.file, buffer)
+        # Stream the upload in 1 MiB chunks so the event loop stays free.
+        # The content digest keys the detection caches.
+        digest = hashlib.blake2b(digest_size=16)
+        async with aiofiles.open(tmp_path, "wb") as buffer:
+            while chunk := await blueprint_file.read(UPLOAD_CHUNK_SIZE):
+                digest.update(chunk)
+                await buffer.write(chunk)
+        content_key = digest.hexdigest()
+        upload_path = UPLOAD_DIR / f"{content_key}{Path(blueprint_file.filename).suffix.lower()}"
+        os.replace(tmp_path, upload_path)
         print(f"Saved file: {upload_path}")
     except Exception as e:
         print(f"Could not save file: {e}")
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
         return JSONResponse(status_code=500, content={
             "success": False,
             "error_message": f"Could not save file: {e}"
@@ -101,17 +130,30 @@ async def convert_blueprint_to_3d(
     # Create a unique ID from the current time
     cache_buster = int(time.time())
     # Add the unique ID to the filename
-    model_filename = f"{Path(blueprint_file.filename).stem}_{cache_buster}.obj"
+    # plus a random tag, so concurrent requests in the same second don't share a file
+    model_filename = f"{Path(blueprint_file.filename).stem}_{cache_buster}_{uuid.uuid4().hex[:8]}.glb"
     # --- END CACHE BUSTER FIX ---
 
     output_model_path = MODELS_DIR / model_filename
     model_url = f"/models/{model_filename}"
 
     try:
-        # --- 1. Find Walls ---
+        # --- 1-3. Find Walls, Doors and Windows ---
+        # The three searches are independent and OpenCV releases the GIL,
+        # so they run concurrently in worker threads. Results are cached per
+        # blueprint content, and the blueprint is decoded once for both templates.
         # NOTE: The implementation of extract_polygons_from_image should ensure 
         # it returns an empty list or raises a specific error if processing fails.
-        wall_polygons = extract_polygons_from_image(str(upload_path))
+        # We look in BACKEND_DIR for the templates
+        door_template_path = str(BACKEND_DIR / "door_template.png") 
+        window_template_path = str(BACKEND_DIR / "window_template.png")
+        wall_polygons, (door_polygons, window_polygons) = await asyncio.gather(
+            asyncio.to_thread(extract_polygons_cached, str(upload_path), content_key),
+            asyncio.to_thread(
+                find_features_cached, str(upload_path), content_key,
+                [door_template_path, window_template_path], threshold=0.7
+            ),
+        )
         if not wall_polygons:
             print("[ERROR] No wall features detected.")
             return JSONResponse(status_code=400, content={
@@ -119,30 +161,24 @@ async def convert_blueprint_to_3d(
                 "error_message": "No wall features detected. Check image contrast/threshold."
             })
         print(f"[INFO] Found {len(wall_polygons)} wall polygons.")
-
-        # --- 2. Find Doors (PATH FIXED) ---
-        # We look in BASE_DIR (the project root) now
-        door_template_path = str(BACKEND_DIR / "door_template.png") 
-        door_polygons = find_features(str(upload_path), door_template_path, threshold=0.7)
         print(f"[INFO] Found {len(door_polygons)} doors.")
-
-        # --- 3. Find Windows (PATH FIXED) ---
-        # We look in BASE_DIR (the project root) now
-        window_template_path = str(BACKEND_DIR / "window_template.png")
-        window_polygons = find_features(str(upload_path), window_template_path, threshold=0.7)
         print(f"[INFO] Found {len(window_polygons)} windows.")
         
        # (Inside the /convert function in main.py)
-        final_model = build_3d_model(
+        final_model = await asyncio.to_thread(
+            build_3d_model,
             wall_polygons=wall_polygons, # Correct
             door_polygons=door_polygons, # Correct
             window_polygons=window_polygons, # Correct
             wall_height=wall_height, # Correct
             wall_thickness_pixels=wall_thickness # Correct
         )
+        if final_model.is_empty:
+            raise ValueError("No valid wall meshes could be created from the detected walls.")
 
         # --- 5. Export and Respond ---
-        final_model.export(output_model_path)
+        # Binary glTF serializes much faster than ASCII OBJ; still keep it off the event loop
+        await asyncio.to_thread(final_model.export, str(output_model_path))
         print(f"Conversion successful. Model saved to '{output_model_path}'")
         
         return JSONResponse(content={
@@ -183,25 +219,17 @@ async def register_user(
     """
     print(f"Attempting to register user: {user.email}")
     
-    # 1. Check if user already exists
-    db_user = db.query(User).filter(User.email == user.email).first()
-    if db_user:
-        print("Error: User with this email already exists.")
-        raise HTTPException(
-            status_code=400, 
-            detail="Email already registered"
-        )
-        
-    # 2. Hash the password
+    # 1. Hash the password
     hashed_password = get_password_hash(user.password)
     
-    # 3. Create new user object
+    # 2. Create new user object
     new_db_user = User(
         email=user.email, 
         hashed_password=hashed_password
     )
     
-    # 4. Add to database and commit
+    # 3. Add to database and commit.
+    # The UNIQUE index on email rejects duplicates, so there's no pre-check query.
     try:
         db.add(new_db_user)
         db.commit()
@@ -213,6 +241,13 @@ async def register_user(
             "user_id": new_db_user.id,
             "email": new_db_user.email
         })
+    except IntegrityError:
+        db.rollback()
+        print("Error: User with this email already exists.")
+        raise HTTPException(
+            status_code=400, 
+            detail="Email already registered"
+        )
     except Exception as e:
         db.rollback()
         print(f"Error creating user: {e}")